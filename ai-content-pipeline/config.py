@@ -3,12 +3,17 @@ Configuration module — loads all environment variables and pipeline settings.
 """
 
 import os
+import re
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load .env from the project root
+# Load .env from the project root once per process tree — child processes
+# inherit the already-populated environment and skip the re-parse.
 _ENV_PATH = Path(__file__).resolve().parent / ".env"
-load_dotenv(_ENV_PATH)
+_DOTENV_SENTINEL = "_PIPELINE_DOTENV_LOADED"
+if not os.environ.get(_DOTENV_SENTINEL):
+    load_dotenv(_ENV_PATH)
+    os.environ[_DOTENV_SENTINEL] = "1"
 
 
 class Config:
@@ -21,6 +26,7 @@ class Config:
     AUDIO_DIR: Path = OUTPUTS_DIR / "audio"
     FINAL_DIR: Path = OUTPUTS_DIR / "final"
     LOGS_DIR: Path = OUTPUTS_DIR / "logs"
+    CACHE_DIR: Path = OUTPUTS_DIR / "cache"
     SOUL_ID_DIR: Path = BASE_DIR / "soul_id"
     PHOTOS_DIR: Path = SOUL_ID_DIR / "photos"
     VOICE_SAMPLES_DIR: Path = SOUL_ID_DIR / "voice_samples"
@@ -40,12 +46,26 @@ class Config:
     POSTS_PER_DAY: int = int(os.getenv("POSTS_PER_DAY", "3"))
     PLATFORMS: list[str] = os.getenv("PLATFORMS", "tiktok,instagram,youtube").split(",")
     APPROVAL_MODE: str = os.getenv("APPROVAL_MODE", "auto")
+    DB_READ_POOL: int = int(os.getenv("DB_READ_POOL", "4"))
+    # "auto" probes for NVENC / VideoToolbox; or name an ffmpeg encoder explicitly
+    VIDEO_ENCODER: str = os.getenv("VIDEO_ENCODER", "auto")
+
+    # ── Apify ──────────────────────────────────────────────────────────
+    # Seconds to reuse an identical actor run; off by default, since a replayed
+    # run hands discovery the same items and they would be queued again
+    APIFY_CACHE_TTL: int = int(os.getenv("APIFY_CACHE_TTL", "0"))
+
+    # ── Gemini ───────────────────────────────────────────────────────────
+    GEMINI_CONCURRENCY: int = int(os.getenv("GEMINI_CONCURRENCY", "5"))
+    GEMINI_REQUESTS_PER_MINUTE: int = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "30"))
 
     # ── Higgsfield ───────────────────────────────────────────────────────
     HIGGSFIELD_BASE_URL: str = "https://api.higgsfield.ai"
+    HIGGSFIELD_CONCURRENCY: int = int(os.getenv("HIGGSFIELD_CONCURRENCY", "4"))
 
     # ── Blotato ──────────────────────────────────────────────────────────
     BLOTATO_BASE_URL: str = "https://api.blotato.com"
+    UPLOAD_CONCURRENCY: int = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
 
     @classmethod
     def ensure_dirs(cls) -> None:
@@ -56,6 +76,7 @@ class Config:
             cls.AUDIO_DIR,
             cls.FINAL_DIR,
             cls.LOGS_DIR,
+            cls.CACHE_DIR,
             cls.SOUL_ID_DIR,
             cls.PHOTOS_DIR,
             cls.VOICE_SAMPLES_DIR,
@@ -66,27 +87,24 @@ class Config:
     def update_env(cls, key: str, value: str) -> None:
         """Write or update a key in the .env file."""
         env_path = cls.BASE_DIR / ".env"
-        lines: list[str] = []
-        found = False
+        entry = f"{key}={value}"
+        pattern = re.compile(rf"(?m)^[ \t]*{re.escape(key)}[ \t]*=.*$")
 
         if env_path.exists():
-            with open(env_path) as f:
-                lines = f.readlines()
-
-        new_lines: list[str] = []
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith(f"{key}=") or stripped.startswith(f"{key} ="):
-                new_lines.append(f"{key}={value}\n")
-                found = True
-            else:
-                new_lines.append(line)
-
-        if not found:
-            new_lines.append(f"{key}={value}\n")
-
-        with open(env_path, "w") as f:
-            f.writelines(new_lines)
+            with open(env_path, "r+") as f:
+                text = f.read()
+                text, count = pattern.subn(lambda _: entry, text)
+                if count:
+                    f.seek(0)
+                    f.write(text)
+                    f.truncate()
+                else:
+                    # Key not present — append at the current (end) position
+                    if text and not text.endswith("\n"):
+                        f.write("\n")
+                    f.write(f"{entry}\n")
+        else:
+            env_path.write_text(f"{entry}\n")
 
         # Also update the live config attribute
         setattr(cls, key, value)
@@ -2,82 +2,208 @@
 SQLite state tracking for the content pipeline.
 """
 
+import json
 import logging
+import queue
 import sqlite3
-from datetime import datetime, timezone
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
 from config import Config
 
 logger = logging.getLogger("pipeline.db")
 
+# ISO-8601 UTC timestamp computed by SQLite, so writes don't format one in Python
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+
+def _script_columns(script: str | None) -> tuple[str, str]:
+    """Derive the (script_hook, script_full) columns from a serialised script."""
+    if not script:
+        return "", ""
+    try:
+        parsed = json.loads(script)
+    except json.JSONDecodeError:
+        return script[:80], script
+    if not isinstance(parsed, dict):
+        text = str(parsed)
+        return text[:80], text
+    hook = parsed.get("hook") or ""
+    full = parsed.get("full_script") or " ".join(
+        p for p in (hook, parsed.get("body") or "", parsed.get("cta") or "") if p
+    )
+    return hook, full
+
 
 class Database:
     """CRUD wrapper around the pipeline SQLite database."""
 
-    def __init__(self, db_path: Path | None = None) -> None:
+    def __init__(self, db_path: Path | None = None, read_pool_size: int | None = None) -> None:
         self.db_path = db_path or Config.DB_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn: sqlite3.Connection | None = None
+        self._write_conn: sqlite3.Connection | None = None
+        self._write_lock = threading.Lock()
+        self._read_pool_size = max(1, read_pool_size or Config.DB_READ_POOL)
+        self._read_pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._read_conns: list[sqlite3.Connection] = []
+        self._read_conns_lock = threading.Lock()
         self._init_db()
 
     # ── Connection helpers ───────────────────────────────────────────────
 
-    def _get_conn(self) -> sqlite3.Connection:
-        if self._conn is None:
-            self._conn = sqlite3.connect(str(self.db_path))
-            self._conn.row_factory = sqlite3.Row
-            self._conn.execute("PRAGMA journal_mode=WAL")
-        return self._conn
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection usable from any thread, in autocommit mode."""
+        conn = sqlite3.connect(
+            str(self.db_path), isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA cache_size=-65536;
+            PRAGMA mmap_size=268435456;
+            PRAGMA temp_store=MEMORY;
+            """
+        )
+        return conn
+
+    def _get_write_conn(self) -> sqlite3.Connection:
+        # Callers must hold self._write_lock
+        if self._write_conn is None:
+            self._write_conn = self._connect()
+        return self._write_conn
+
+    @contextmanager
+    def _writer(self) -> Iterator[sqlite3.Connection]:
+        """Serialise writers on the single write connection, inside one transaction."""
+        with self._write_lock:
+            conn = self._get_write_conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                # A failed COMMIT (e.g. SQLITE_BUSY) leaves the transaction open
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection, opening up to read_pool_size of them lazily."""
+        conn = self._acquire_read_conn()
+        try:
+            yield conn
+        finally:
+            with self._read_conns_lock:
+                if conn in self._read_conns:
+                    self._read_pool.put(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()  # close() ran while it was borrowed — don't pool it
+
+    def _acquire_read_conn(self) -> sqlite3.Connection:
+        while True:
+            try:
+                return self._read_pool.get_nowait()
+            except queue.Empty:
+                pass
+            with self._read_conns_lock:
+                if len(self._read_conns) < self._read_pool_size:
+                    conn = self._connect()
+                    self._read_conns.append(conn)
+                    return conn
+            # Pool exhausted: wait for a return, re-checking now and then in
+            # case close() dropped the borrowed connections
+            try:
+                return self._read_pool.get(timeout=1.0)
+            except queue.Empty:
+                continue
 
     def close(self) -> None:
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        with self._write_lock:
+            if self._write_conn:
+                # Refresh planner statistics for the indexes before letting go
+                self._write_conn.execute("PRAGMA optimize")
+                self._write_conn.close()
+                self._write_conn = None
+        with self._read_conns_lock:
+            # Idle connections close now; borrowed ones are closed by _reader
+            # when they come back, since they are no longer tracked
+            while True:
+                try:
+                    self._read_pool.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._read_conns.clear()
 
     # ── Schema ───────────────────────────────────────────────────────────
 
     def _init_db(self) -> None:
-        conn = self._get_conn()
-        conn.executescript(
-            """
-            CREATE TABLE IF NOT EXISTS content_queue (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_url TEXT,
-                topic TEXT,
-                script TEXT,
-                caption TEXT,
-                status TEXT DEFAULT 'pending',
-                video_path TEXT,
-                audio_path TEXT,
-                final_video_path TEXT,
-                post_submission_id TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS soul_id_registry (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                soul_id TEXT,
-                voice_id TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS post_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content_id INTEGER,
-                platform TEXT,
-                post_id TEXT,
-                status TEXT,
-                posted_at DATETIME,
-                FOREIGN KEY (content_id) REFERENCES content_queue(id)
-            );
-            """
-        )
-        conn.commit()
+        with self._write_lock:
+            self._get_write_conn().executescript(
+                """
+                CREATE TABLE IF NOT EXISTS content_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_url TEXT,
+                    topic TEXT,
+                    script TEXT,
+                    script_hook TEXT,
+                    script_full TEXT,
+                    caption TEXT,
+                    status TEXT DEFAULT 'pending',
+                    video_path TEXT,
+                    audio_path TEXT,
+                    final_video_path TEXT,
+                    post_submission_id TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TABLE IF NOT EXISTS soul_id_registry (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    soul_id TEXT,
+                    voice_id TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                );
+
+                CREATE TABLE IF NOT EXISTS post_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content_id INTEGER,
+                    platform TEXT,
+                    post_id TEXT,
+                    status TEXT,
+                    posted_at DATETIME,
+                    FOREIGN KEY (content_id) REFERENCES content_queue(id)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_content_status
+                    ON content_queue(status, created_at);
+
+                CREATE INDEX IF NOT EXISTS idx_postlog_content
+                    ON post_log(content_id, posted_at DESC);
+                """
+            )
+        with self._writer() as conn:
+            self._migrate(conn)
         logger.debug("Database initialized at %s", self.db_path)
 
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Bring databases created by older versions up to the current schema."""
+        columns = {r["name"] for r in conn.execute("PRAGMA table_info(content_queue)")}
+        if "script_hook" not in columns:
+            conn.execute("ALTER TABLE content_queue ADD COLUMN script_hook TEXT")
+            conn.execute("ALTER TABLE content_queue ADD COLUMN script_full TEXT")
+            rows = conn.execute("SELECT id, script FROM content_queue").fetchall()
+            conn.executemany(
+                "UPDATE content_queue SET script_hook = ?, script_full = ? WHERE id = ?",
+                [(*_script_columns(r["script"]), r["id"]) for r in rows],
+            )
+            logger.info("Added script_hook/script_full columns (%d rows backfilled)", len(rows))
+
     # ── content_queue CRUD ───────────────────────────────────────────────
 
     def add_content(
@@ -88,107 +214,200 @@ class Database:
         caption: str,
     ) -> int:
         """Insert a new content item. Returns the row id."""
-        conn = self._get_conn()
-        cur = conn.execute(
-            """INSERT INTO content_queue (source_url, topic, script, caption, status)
-               VALUES (?, ?, ?, ?, 'pending')""",
-            (source_url, topic, script, caption),
-        )
-        conn.commit()
+        with self._writer() as conn:
+            cur = conn.execute(
+                """INSERT INTO content_queue
+                       (source_url, topic, script, script_hook, script_full, caption, status)
+                   VALUES (?, ?, ?, ?, ?, ?, 'pending')""",
+                (source_url, topic, script, *_script_columns(script), caption),
+            )
         row_id = cur.lastrowid or 0
         logger.debug("Added content id=%d topic=%s", row_id, topic)
         return row_id
 
+    def add_contents_bulk(self, rows: list[tuple[str, str, str, str]]) -> list[int]:
+        """Insert many (source_url, topic, script, caption) rows in one transaction.
+
+        Returns the new row ids in input order.
+        """
+        row_ids: list[int] = []
+        with self._writer() as conn:
+            for source_url, topic, script, caption in rows:
+                cur = conn.execute(
+                    """INSERT INTO content_queue
+                           (source_url, topic, script, script_hook, script_full, caption, status)
+                       VALUES (?, ?, ?, ?, ?, ?, 'pending')""",
+                    (source_url, topic, script, *_script_columns(script), caption),
+                )
+                row_ids.append(cur.lastrowid or 0)
+        logger.debug("Added %d content items", len(row_ids))
+        return row_ids
+
     def update_content_status(self, content_id: int, status: str, **fields: Any) -> None:
         """Update status and optional extra fields for a content item."""
-        conn = self._get_conn()
-        now = datetime.now(timezone.utc).isoformat()
-        set_clauses = ["status = ?", "updated_at = ?"]
-        params: list[Any] = [status, now]
+        set_clauses = ["status = ?", f"updated_at = {_NOW_SQL}"]
+        params: list[Any] = [status]
         for key, val in fields.items():
             set_clauses.append(f"{key} = ?")
             params.append(val)
         params.append(content_id)
-        conn.execute(
-            f"UPDATE content_queue SET {', '.join(set_clauses)} WHERE id = ?",
-            params,
-        )
-        conn.commit()
+        with self._writer() as conn:
+            conn.execute(
+                f"UPDATE content_queue SET {', '.join(set_clauses)} WHERE id = ?",
+                params,
+            )
         logger.debug("Updated content id=%d status=%s", content_id, status)
 
-    def get_content(self, content_id: int) -> dict[str, Any] | None:
+    def bulk_update_status(
+        self,
+        content_ids: list[int],
+        status: str,
+        fields_per_id: dict[int, dict[str, Any]] | None = None,
+        post_logs: list[tuple[int, str, str, str]] | None = None,
+    ) -> None:
+        """Move many content items to ``status`` in a single transaction.
+
+        ``fields_per_id`` sets extra columns per item, and ``post_logs`` rows of
+        (content_id, platform, post_id, status) are written in the same commit.
+        """
+        fields_per_id = fields_per_id or {}
+        # Group rows by the set of extra columns so each shape is one executemany
+        groups: dict[tuple[str, ...], list[tuple[Any, ...]]] = {}
+        for content_id in content_ids:
+            fields = fields_per_id.get(content_id, {})
+            groups.setdefault(tuple(fields), []).append(
+                (status, *fields.values(), content_id)
+            )
+
+        with self._writer() as conn:
+            for keys, params in groups.items():
+                set_clauses = ["status = ?", f"updated_at = {_NOW_SQL}"]
+                set_clauses.extend(f"{key} = ?" for key in keys)
+                conn.executemany(
+                    f"UPDATE content_queue SET {', '.join(set_clauses)} WHERE id = ?",
+                    params,
+                )
+            if post_logs:
+                conn.executemany(
+                    f"""INSERT INTO post_log (content_id, platform, post_id, status, posted_at)
+                        VALUES (?, ?, ?, ?, {_NOW_SQL})""",
+                    post_logs,
+                )
+        logger.debug("Updated %d content items to status=%s", len(content_ids), status)
+
+    def get_content(self, content_id: int) -> sqlite3.Row | None:
         """Fetch a single content item by id."""
-        conn = self._get_conn()
-        row = conn.execute("SELECT * FROM content_queue WHERE id = ?", (content_id,)).fetchone()
-        return dict(row) if row else None
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT * FROM content_queue WHERE id = ?", (content_id,)
+            ).fetchone()
+        return row
 
-    def get_contents_by_status(self, status: str) -> list[dict[str, Any]]:
+    def get_contents_by_ids(self, content_ids: list[int]) -> dict[int, sqlite3.Row]:
+        """Fetch the generation inputs (topic, script hook/text, caption) for many items, keyed by id."""
+        if not content_ids:
+            return {}
+        placeholders = ",".join("?" * len(content_ids))
+        with self._reader() as conn:
+            rows = conn.execute(
+                f"""SELECT id, topic, script_hook, script_full, caption FROM content_queue
+                    WHERE id IN ({placeholders})""",
+                content_ids,
+            ).fetchall()
+        return {r["id"]: r for r in rows}
+
+    def get_generated_by_ids(self, content_ids: list[int]) -> dict[int, sqlite3.Row]:
+        """Fetch caption and final_video_path for the ids that are in 'generated' status."""
+        if not content_ids:
+            return {}
+        placeholders = ",".join("?" * len(content_ids))
+        with self._reader() as conn:
+            rows = conn.execute(
+                f"""SELECT id, caption, final_video_path FROM content_queue
+                    WHERE status = 'generated' AND id IN ({placeholders})""",
+                content_ids,
+            ).fetchall()
+        return {r["id"]: r for r in rows}
+
+    def get_contents_by_status(self, status: str) -> list[sqlite3.Row]:
         """Fetch all content items with the given status."""
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT * FROM content_queue WHERE status = ? ORDER BY created_at",
-            (status,),
-        ).fetchall()
-        return [dict(r) for r in rows]
-
-    def get_all_contents(self) -> list[dict[str, Any]]:
-        """Fetch all content items."""
-        conn = self._get_conn()
-        rows = conn.execute("SELECT * FROM content_queue ORDER BY created_at DESC").fetchall()
-        return [dict(r) for r in rows]
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT * FROM content_queue WHERE status = ? ORDER BY created_at",
+                (status,),
+            ).fetchall()
+        return rows
+
+    def get_all_contents(
+        self, limit: int | None = None, offset: int = 0
+    ) -> list[sqlite3.Row]:
+        """Fetch content items, newest first, optionally one page at a time."""
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT * FROM content_queue ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return rows
+
+    def get_recent_contents(self, limit: int = 10) -> list[sqlite3.Row]:
+        """Fetch the newest items with just the columns the status view prints."""
+        with self._reader() as conn:
+            rows = conn.execute(
+                """SELECT id, status, topic, created_at FROM content_queue
+                   ORDER BY created_at DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+        return rows
 
     # ── soul_id_registry CRUD ────────────────────────────────────────────
 
     def save_soul_id(self, soul_id: str, voice_id: str = "") -> int:
-        conn = self._get_conn()
-        cur = conn.execute(
-            "INSERT INTO soul_id_registry (soul_id, voice_id) VALUES (?, ?)",
-            (soul_id, voice_id),
-        )
-        conn.commit()
+        with self._writer() as conn:
+            cur = conn.execute(
+                "INSERT INTO soul_id_registry (soul_id, voice_id) VALUES (?, ?)",
+                (soul_id, voice_id),
+            )
         return cur.lastrowid or 0
 
-    def get_latest_soul_id(self) -> dict[str, Any] | None:
-        conn = self._get_conn()
-        row = conn.execute(
-            "SELECT * FROM soul_id_registry ORDER BY created_at DESC LIMIT 1"
-        ).fetchone()
-        return dict(row) if row else None
+    def get_latest_soul_id(self) -> sqlite3.Row | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT * FROM soul_id_registry ORDER BY created_at DESC LIMIT 1"
+            ).fetchone()
+        return row
 
     # ── post_log CRUD ────────────────────────────────────────────────────
 
     def log_post(
         self, content_id: int, platform: str, post_id: str, status: str
     ) -> int:
-        conn = self._get_conn()
-        now = datetime.now(timezone.utc).isoformat()
-        cur = conn.execute(
-            """INSERT INTO post_log (content_id, platform, post_id, status, posted_at)
-               VALUES (?, ?, ?, ?, ?)""",
-            (content_id, platform, post_id, status, now),
-        )
-        conn.commit()
+        with self._writer() as conn:
+            cur = conn.execute(
+                f"""INSERT INTO post_log (content_id, platform, post_id, status, posted_at)
+                    VALUES (?, ?, ?, ?, {_NOW_SQL})""",
+                (content_id, platform, post_id, status),
+            )
         return cur.lastrowid or 0
 
-    def get_post_logs(self, content_id: int | None = None) -> list[dict[str, Any]]:
-        conn = self._get_conn()
-        if content_id:
-            rows = conn.execute(
-                "SELECT * FROM post_log WHERE content_id = ? ORDER BY posted_at DESC",
-                (content_id,),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM post_log ORDER BY posted_at DESC LIMIT 100"
-            ).fetchall()
-        return [dict(r) for r in rows]
+    def get_post_logs(self, content_id: int | None = None) -> list[sqlite3.Row]:
+        with self._reader() as conn:
+            if content_id:
+                rows = conn.execute(
+                    "SELECT * FROM post_log WHERE content_id = ? ORDER BY posted_at DESC",
+                    (content_id,),
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM post_log ORDER BY posted_at DESC LIMIT 100"
+                ).fetchall()
+        return rows
 
     # ── Summary ──────────────────────────────────────────────────────────
 
     def pipeline_summary(self) -> dict[str, int]:
         """Return counts by status for the content_queue."""
-        conn = self._get_conn()
-        rows = conn.execute(
-            "SELECT status, COUNT(*) as cnt FROM content_queue GROUP BY status"
-        ).fetchall()
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) as cnt FROM content_queue GROUP BY status"
+            ).fetchall()
         return {r["status"]: r["cnt"] for r in rows}
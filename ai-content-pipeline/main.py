@@ -34,7 +34,7 @@ def show_status() -> None:
     Config.ensure_dirs()
     db = Database()
     summary = db.pipeline_summary()
-    all_items = db.get_all_contents()
+    recent_items = db.get_recent_contents(limit=10)
 
     print("\n=== Pipeline Status ===")
     if not summary:
@@ -46,12 +46,12 @@ def show_status() -> None:
             print(f"    {status}: {count}")
 
     # Show recent items
-    if all_items:
+    if recent_items:
         print(f"\n  Recent items (last 10):")
-        for item in all_items[:10]:
+        for item in recent_items:
             print(
                 f"    [{item['id']}] {item['status']:12s} | "
-                f"{(item.get('topic') or 'no topic')[:50]} | "
+                f"{(item['topic'] or 'no topic')[:50]} | "
                 f"{item['created_at']}"
             )
 
@@ -4,7 +4,10 @@ Phase 1b: Gemini-powered content analysis and script generation.
 
 import json
 import logging
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import google.generativeai as genai
@@ -13,6 +16,9 @@ from config import Config
 
 logger = logging.getLogger("pipeline.analyzer")
 
+# Leading ```json / ``` fence and trailing ``` fence around a model response
+_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
 ANALYSIS_PROMPT = """Analyze this viral social media content and extract:
 1. Main hook (first 3 seconds concept)
 2. Core topic/theme
@@ -39,6 +45,23 @@ Respond in JSON format with keys: hook, body, cta, full_script, caption
 The full_script should be the complete text read aloud, combining hook + body + cta."""
 
 
+class _RateLimiter:
+    """Spaces call start times evenly across threads to respect a per-minute quota."""
+
+    def __init__(self, per_minute: int) -> None:
+        self._interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class GeminiAnalyzer:
     """Uses Google Gemini to analyze scraped content and generate scripts."""
 
@@ -47,20 +70,14 @@ class GeminiAnalyzer:
             raise ValueError("GEMINI_API_KEY is not set in .env")
         genai.configure(api_key=Config.GEMINI_API_KEY)
         self.model = genai.GenerativeModel("gemini-1.5-flash")
+        self._limiter = _RateLimiter(Config.GEMINI_REQUESTS_PER_MINUTE)
 
     def _call_gemini(self, prompt: str) -> dict[str, Any]:
         """Send a prompt to Gemini and parse the JSON response."""
+        self._limiter.wait()
         try:
             response = self.model.generate_content(prompt)
-            text = response.text.strip()
-
-            # Strip markdown code fences if present
-            if text.startswith("```"):
-                lines = text.split("\n")
-                # Remove first and last lines (```json and ```)
-                lines = [l for l in lines if not l.strip().startswith("```")]
-                text = "\n".join(lines)
-
+            text = _FENCE_RE.sub("", response.text.strip())
             return json.loads(text)
         except json.JSONDecodeError:
             logger.warning("Gemini response was not valid JSON, wrapping as raw text")
@@ -69,32 +86,41 @@ class GeminiAnalyzer:
             logger.error("Gemini API call failed: %s", exc)
             return {}
 
+    def _analyze_item(self, index: int, total: int, item: dict[str, Any]) -> dict[str, Any]:
+        """Analyze one scraped item. Returns an empty dict on failure."""
+        logger.info("Analyzing item %d/%d: %s", index + 1, total, item.get("url", ""))
+        prompt = ANALYSIS_PROMPT.format(
+            description=item.get("description", ""),
+            platform=item.get("platform", "unknown"),
+            likes=item.get("likes", 0),
+            views=item.get("views", 0),
+            shares=item.get("shares", 0),
+        )
+        analysis = self._call_gemini(prompt)
+        if analysis:
+            analysis["source_url"] = item.get("url", "")
+            analysis["platform"] = item.get("platform", "unknown")
+        return analysis
+
     def analyze_content(self, content_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
         """Analyze a list of scraped content items with Gemini.
 
-        Returns a list of analysis dicts (one per input item).
+        Requests run concurrently (up to GEMINI_CONCURRENCY in flight) while the
+        shared rate limiter keeps call starts within GEMINI_REQUESTS_PER_MINUTE.
+        Returns a list of analysis dicts in input order, skipping failures.
         """
-        results: list[dict[str, Any]] = []
-        for i, item in enumerate(content_list):
-            logger.info("Analyzing item %d/%d: %s", i + 1, len(content_list), item.get("url", ""))
-            prompt = ANALYSIS_PROMPT.format(
-                description=item.get("description", ""),
-                platform=item.get("platform", "unknown"),
-                likes=item.get("likes", 0),
-                views=item.get("views", 0),
-                shares=item.get("shares", 0),
+        total = len(content_list)
+        if not total:
+            return []
+
+        workers = max(1, min(Config.GEMINI_CONCURRENCY, total))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            analyses = list(
+                pool.map(self._analyze_item, range(total), [total] * total, content_list)
             )
-            analysis = self._call_gemini(prompt)
-            if analysis:
-                analysis["source_url"] = item.get("url", "")
-                analysis["platform"] = item.get("platform", "unknown")
-                results.append(analysis)
-
-            # Rate-limit guard: 2-second delay between calls
-            if i < len(content_list) - 1:
-                time.sleep(2)
 
-        logger.info("Analyzed %d/%d items successfully", len(results), len(content_list))
+        results = [a for a in analyses if a]
+        logger.info("Analyzed %d/%d items successfully", len(results), total)
         return results
 
     def generate_script(
@@ -114,3 +140,20 @@ class GeminiAnalyzer:
         if result:
             logger.info("Generated %s script for topic: %s", style, topic)
         return result
+
+
+_analyzer: GeminiAnalyzer | None = None
+_analyzer_lock = threading.Lock()
+
+
+def get_analyzer() -> GeminiAnalyzer:
+    """Return the process-wide analyzer, creating it on first use.
+
+    Reusing one instance keeps the Gemini client channel and the rate limiter
+    alive across continuous-mode runs.
+    """
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = GeminiAnalyzer()
+        return _analyzer
@@ -5,22 +5,42 @@ Pipeline orchestrator — coordinates all phases of the content pipeline.
 import json
 import logging
 import time
+import uuid
 from typing import Any
 
-import schedule as schedule_lib
-
 from config import Config
 from database import Database
-from pipeline.scraper import ApifyScraper
-from pipeline.analyzer import GeminiAnalyzer
-from pipeline.video_generator import HiggsFieldGenerator
-from pipeline.voice_synthesizer import ElevenLabsVoice
-from pipeline.video_editor import VideoEditor
-from pipeline.scheduler import BlatoScheduler
 from utils.file_manager import FileManager
 
+# Phase implementations (and their SDKs — google.generativeai, apify_client,
+# elevenlabs, ...) are imported inside the methods that use them, so callers
+# that only touch the database don't pay their import cost.
+
 logger = logging.getLogger("pipeline.orchestrator")
 
+# Script fields read by the generation phase (hook for video, the rest for TTS)
+_SCRIPT_KEYS = ("hook", "body", "cta", "full_script")
+
+# Higgsfield generation settings (also part of each job's Idempotency-Key)
+_VIDEO_DURATION = 15
+_MOTION_INTENSITY = 0.7
+
+
+def _extract_script(item: dict[str, Any]) -> str:
+    """Serialise only the script fields of a Gemini analysis for the queue.
+
+    The analysis ``script`` may be a dict of script parts or the full script as
+    plain text; the analysis-level ``hook`` fills in when the script lacks one.
+    """
+    script = item.get("script")
+    source = script if isinstance(script, dict) else item
+    fields = {k: source[k] for k in _SCRIPT_KEYS if k in source}
+    if isinstance(script, str) and script:
+        fields.setdefault("full_script", script)
+    if "hook" not in fields and item.get("hook"):
+        fields["hook"] = item["hook"]
+    return json.dumps(fields, default=str)
+
 
 class PipelineOrchestrator:
     """Coordinates discovery, generation, and scheduling phases."""
@@ -39,6 +59,9 @@ class PipelineOrchestrator:
         logger.info("=== PHASE 1: Content Discovery ===")
         queue_ids: list[int] = []
 
+        from pipeline.analyzer import get_analyzer
+        from pipeline.scraper import ApifyScraper
+
         # Step 1a: scrape
         try:
             scraper = ApifyScraper()
@@ -53,7 +76,7 @@ class PipelineOrchestrator:
 
         # Step 1b: analyse
         try:
-            analyzer = GeminiAnalyzer()
+            analyzer = get_analyzer()
             analyses = analyzer.analyze_content(raw_content)
         except Exception as exc:
             logger.error("Analysis failed: %s", exc)
@@ -63,18 +86,20 @@ class PipelineOrchestrator:
             logger.warning("No analyses produced")
             return queue_ids
 
-        # Step 1c: queue
-        for item in analyses:
-            try:
-                row_id = self.db.add_content(
-                    source_url=item.get("source_url", ""),
-                    topic=item.get("topic", ""),
-                    script=json.dumps(item.get("script", item), default=str),
-                    caption=item.get("caption", ""),
-                )
-                queue_ids.append(row_id)
-            except Exception as exc:
-                logger.error("Failed to queue item: %s", exc)
+        # Step 1c: queue (one transaction for the whole batch)
+        rows = [
+            (
+                item.get("source_url", ""),
+                item.get("topic", ""),
+                _extract_script(item),
+                item.get("caption", ""),
+            )
+            for item in analyses
+        ]
+        try:
+            queue_ids = self.db.add_contents_bulk(rows)
+        except Exception as exc:
+            logger.error("Failed to queue %d items: %s", len(rows), exc)
 
         logger.info("Discovery complete: %d items queued", len(queue_ids))
         return queue_ids
@@ -95,74 +120,130 @@ class PipelineOrchestrator:
             )
             return []
 
+        from pipeline.video_editor import VideoEditor
+        from pipeline.video_generator import HiggsFieldGenerator
+        from pipeline.voice_synthesizer import ElevenLabsVoice
+
         video_gen = HiggsFieldGenerator()
         voice = ElevenLabsVoice()
         editor = VideoEditor()
 
         generated_ids: list[int] = []
+        jobs: list[tuple[int, dict[str, str], str, str]] = []
+        pending: list[tuple[int, str, str]] = []
+        compose_items: list[dict[str, Any]] = []
+
+        contents = self.db.get_contents_by_ids(queue_ids)
 
         for qid in queue_ids:
-            content = self.db.get_content(qid)
+            content = contents.get(qid)
             if not content:
                 continue
 
             self.db.update_content_status(qid, "generating")
-            logger.info("Generating content id=%d topic=%s", qid, content.get("topic", ""))
+            logger.info("Generating content id=%d topic=%s", qid, content["topic"])
+
+            # Script fields were parsed into columns at queue time
+            script = {
+                "hook": content["script_hook"] or "",
+                "full_script": content["script_full"] or "",
+            }
+            hook = script["hook"] or content["topic"] or "AI content"
+            jobs.append((qid, script, hook, content["caption"] or ""))
+
+        # Phase 2: generate videos — Higgsfield jobs run side by side. The
+        # Idempotency-Key is fixed per queue item and request parameters, so a
+        # resent submit (or a re-run of the same item) can't bill a second job
+        prompts = [hook for _, _, hook, _ in jobs]
+        keys = [
+            str(uuid.uuid5(
+                uuid.NAMESPACE_URL,
+                f"{qid}|{soul_id}|{prompt}|{_VIDEO_DURATION}|{_MOTION_INTENSITY}",
+            ))
+            for (qid, _, _, _), prompt in zip(jobs, prompts)
+        ]
+        try:
+            video_paths = video_gen.generate_videos(
+                prompts, soul_id,
+                idempotency_keys=keys,
+                duration=_VIDEO_DURATION,
+                motion_intensity=_MOTION_INTENSITY,
+            )
+        except Exception as exc:
+            # Don't leave the whole batch stuck in "generating"
+            logger.error("Video generation batch failed: %s", exc)
+            for qid, _, _, _ in jobs:
+                self.db.update_content_status(qid, "failed")
+            return generated_ids
 
+        for (qid, script, hook, caption), video_path in zip(jobs, video_paths):
             try:
-                # Parse script
-                script_raw = content.get("script", "{}")
-                try:
-                    script = json.loads(script_raw) if isinstance(script_raw, str) else script_raw
-                except json.JSONDecodeError:
-                    script = {"full_script": script_raw, "hook": script_raw[:80]}
-
-                hook = script.get("hook", content.get("topic", "AI content"))
-                caption = content.get("caption", "")
-
-                # Phase 2: generate video
-                video_path = video_gen.generate_video(hook, soul_id)
                 if not video_path:
                     logger.warning("Video generation failed for id=%d", qid)
                     self.db.update_content_status(qid, "failed")
                     continue
 
-                # Phase 3: synthesize voice
-                audio_path = voice.synthesize_script(script)
+                # Phase 3: synthesize voice (per-item name — timestamps alone
+                # collide when two syntheses finish in the same second)
+                audio_path = voice.synthesize_script(
+                    script,
+                    output_path=str(
+                        Config.AUDIO_DIR / FileManager.timestamped_name(f"voice_{qid}", "mp3")
+                    ),
+                )
                 if not audio_path:
                     logger.warning("Voice synthesis failed for id=%d", qid)
                     self.db.update_content_status(qid, "failed", video_path=video_path)
                     continue
 
-                # Phase 4: compose final video
-                final_path = editor.compose_final(
+                # Phase 4 runs as one batch below; give each item its own output
+                pending.append((qid, video_path, audio_path))
+                compose_items.append({
+                    "video_path": video_path,
+                    "audio_path": audio_path,
+                    "caption": caption,
+                    "hook": hook,
+                    "output_path": str(
+                        Config.FINAL_DIR / FileManager.timestamped_name(f"final_{qid}", "mp4")
+                    ),
+                })
+
+            except Exception as exc:
+                logger.error("Generation failed for id=%d: %s", qid, exc)
+                self.db.update_content_status(qid, "failed", video_path=video_path)
+
+        # Phase 4: compose final videos in parallel
+        try:
+            final_paths = editor.compose_batch(compose_items)
+        except Exception as exc:
+            logger.error("Video composition batch failed: %s", exc)
+            for qid, video_path, audio_path in pending:
+                self.db.update_content_status(
+                    qid, "failed",
                     video_path=video_path,
                     audio_path=audio_path,
-                    caption=caption,
-                    hook=hook,
                 )
-                if not final_path:
-                    logger.warning("Video composition failed for id=%d", qid)
-                    self.db.update_content_status(
-                        qid, "failed",
-                        video_path=video_path,
-                        audio_path=audio_path,
-                    )
-                    continue
+            return generated_ids
 
-                # Success
+        for (qid, video_path, audio_path), final_path in zip(pending, final_paths):
+            if not final_path:
+                logger.warning("Video composition failed for id=%d", qid)
                 self.db.update_content_status(
-                    qid, "generated",
+                    qid, "failed",
                     video_path=video_path,
                     audio_path=audio_path,
-                    final_video_path=final_path,
                 )
-                generated_ids.append(qid)
-                logger.info("Content id=%d generated successfully", qid)
+                continue
 
-            except Exception as exc:
-                logger.error("Generation failed for id=%d: %s", qid, exc)
-                self.db.update_content_status(qid, "failed")
+            # Success
+            self.db.update_content_status(
+                qid, "generated",
+                video_path=video_path,
+                audio_path=audio_path,
+                final_video_path=final_path,
+            )
+            generated_ids.append(qid)
+            logger.info("Content id=%d generated successfully", qid)
 
         logger.info("Generation complete: %d/%d succeeded", len(generated_ids), len(queue_ids))
         return generated_ids
@@ -179,6 +260,8 @@ class PipelineOrchestrator:
         logger.info("=== PHASE 5: Scheduling ===")
         platforms = platforms or Config.PLATFORMS
 
+        from pipeline.scheduler import BlatoScheduler
+
         blotato = BlatoScheduler()
         if not Config.BLOTATO_API_KEY:
             logger.warning("BLOTATO_API_KEY not set — skipping scheduling")
@@ -188,17 +271,19 @@ class PipelineOrchestrator:
         batch: list[dict[str, str]] = []
         id_map: dict[int, int] = {}  # batch_index -> queue_id
 
+        contents = self.db.get_generated_by_ids(queue_ids)
+
         for qid in queue_ids:
-            content = self.db.get_content(qid)
-            if not content or content.get("status") != "generated":
+            content = contents.get(qid)
+            if not content:
                 continue
-            final_path = content.get("final_video_path", "")
+            final_path = content["final_video_path"]
             if not final_path:
                 continue
             idx = len(batch)
             batch.append({
                 "video_path": final_path,
-                "caption": content.get("caption", ""),
+                "caption": content["caption"] or "",
             })
             id_map[idx] = qid
 
@@ -208,18 +293,27 @@ class PipelineOrchestrator:
 
         submission_ids = blotato.schedule_batch(batch, platforms)
 
-        scheduled_ids: list[int] = []
+        scheduled: dict[int, str] = {}  # queue_id -> submission_id
         for i, sub_id in enumerate(submission_ids):
             qid = id_map.get(i)
             if qid and sub_id:
-                self.db.update_content_status(
-                    qid, "scheduled",
-                    post_submission_id=sub_id,
-                )
-                # Log to post_log
-                for platform in platforms:
-                    self.db.log_post(qid, platform, sub_id, "scheduled")
-                scheduled_ids.append(qid)
+                scheduled[qid] = sub_id
+
+        # One transaction for all status updates and post_log rows
+        if scheduled:
+            self.db.bulk_update_status(
+                list(scheduled),
+                "scheduled",
+                fields_per_id={
+                    qid: {"post_submission_id": sub_id} for qid, sub_id in scheduled.items()
+                },
+                post_logs=[
+                    (qid, platform, sub_id, "scheduled")
+                    for qid, sub_id in scheduled.items()
+                    for platform in platforms
+                ],
+            )
+        scheduled_ids = list(scheduled)
 
         logger.info("Scheduling complete: %d/%d scheduled", len(scheduled_ids), len(queue_ids))
         return scheduled_ids
@@ -260,6 +354,8 @@ class PipelineOrchestrator:
 
     def run_continuous(self, interval_hours: int = 24) -> None:
         """Run the full pipeline on a recurring schedule."""
+        import schedule as schedule_lib
+
         logger.info("Starting continuous mode — running every %d hours", interval_hours)
 
         # Run once immediately
@@ -271,7 +367,12 @@ class PipelineOrchestrator:
         logger.info("Scheduler active. Press Ctrl+C to stop.")
         try:
             while True:
+                # Sleep until the next job is due instead of waking every minute
+                idle = schedule_lib.idle_seconds()
+                if idle is None:
+                    break
+                if idle > 0:
+                    time.sleep(min(idle, 3600))
                 schedule_lib.run_pending()
-                time.sleep(60)
         except KeyboardInterrupt:
             logger.info("Continuous mode stopped by user")
@@ -2,12 +2,17 @@
 Phase 5: Blotato-based social media scheduling and posting.
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 
 from config import Config
 from utils.file_manager import FileManager
@@ -24,11 +29,41 @@ class BlatoScheduler:
         if not self.api_key:
             logger.warning("BLOTATO_API_KEY not set — scheduling will be skipped")
 
+        # One keep-alive session for every sync call; idempotent requests
+        # (status checks) are retried on transient gateway errors
+        self._session = requests.Session()
+        self._session.headers.update(self._headers())
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=16,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+                ),
+            ),
+        )
+
     def _headers(self) -> dict[str, str]:
         return {
             "x-api-key": self.api_key,
         }
 
+    @staticmethod
+    def _post_body(
+        media_id: str, caption: str, platforms: list[str], schedule_time: str | None
+    ) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "platforms": platforms,
+            "media_ids": [media_id],
+            "caption": caption,
+        }
+        if schedule_time:
+            body["schedule_time"] = schedule_time
+        else:
+            body["schedule"] = "next_free_slot"
+        return body
+
     # ── Media upload ─────────────────────────────────────────────────────
 
     def upload_media(self, file_path: str) -> str | None:
@@ -44,11 +79,15 @@ class BlatoScheduler:
 
         try:
             with open(file_path, "rb") as f:
-                files = {"file": (Path(file_path).name, f, "video/mp4")}
-                resp = requests.post(
+                # Streams the file from disk in chunks instead of building the
+                # whole multipart body in memory
+                encoder = MultipartEncoder(
+                    fields={"file": (Path(file_path).name, f, "video/mp4")}
+                )
+                resp = self._session.post(
                     url,
-                    headers=self._headers(),
-                    files=files,
+                    headers={"Content-Type": encoder.content_type},
+                    data=encoder,
                     timeout=120,
                 )
                 resp.raise_for_status()
@@ -82,21 +121,11 @@ class BlatoScheduler:
             return None
 
         url = f"{self.base_url}/v2/posts"
-        body: dict[str, Any] = {
-            "platforms": platforms,
-            "media_ids": [media_id],
-            "caption": caption,
-        }
-
-        if schedule_time:
-            body["schedule_time"] = schedule_time
-        else:
-            body["schedule"] = "next_free_slot"
+        body = self._post_body(media_id, caption, platforms, schedule_time)
 
         try:
-            resp = requests.post(
+            resp = self._session.post(
                 url,
-                headers={**self._headers(), "Content-Type": "application/json"},
                 json=body,
                 timeout=60,
             )
@@ -113,6 +142,69 @@ class BlatoScheduler:
             logger.error("Post scheduling failed: %s", exc)
             return None
 
+    # ── Async upload + scheduling ────────────────────────────────────────
+
+    async def _upload_media_async(
+        self, session: aiohttp.ClientSession, file_path: str
+    ) -> str | None:
+        """Async counterpart of upload_media; the file is streamed from disk."""
+        url = f"{self.base_url}/v2/media/upload"
+        try:
+            with open(file_path, "rb") as f:
+                form = aiohttp.FormData()
+                form.add_field(
+                    "file", f, filename=Path(file_path).name, content_type="video/mp4"
+                )
+                # Per-socket limits like requests' timeout=120; no cap on the
+                # whole upload, which can be long with several sharing the uplink
+                async with session.post(
+                    url,
+                    data=form,
+                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120),
+                ) as resp:
+                    resp.raise_for_status()
+                    data = await resp.json()
+            media_id = data.get("media_id", data.get("id", ""))
+            if media_id:
+                logger.info("Uploaded media: %s -> %s", file_path, media_id)
+                return media_id
+            logger.error("No media_id in upload response: %s", data)
+            return None
+
+        except Exception as exc:
+            logger.error("Media upload failed for %s: %s", file_path, exc)
+            return None
+
+    async def _schedule_post_async(
+        self,
+        session: aiohttp.ClientSession,
+        media_id: str,
+        caption: str,
+        platforms: list[str],
+        schedule_time: str | None = None,
+    ) -> str | None:
+        """Async counterpart of schedule_post."""
+        url = f"{self.base_url}/v2/posts"
+        body = self._post_body(media_id, caption, platforms, schedule_time)
+        try:
+            async with session.post(
+                url,
+                json=body,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60),
+            ) as resp:
+                resp.raise_for_status()
+                data = await resp.json()
+            submission_id = data.get("post_submission_id", data.get("id", ""))
+            if submission_id:
+                logger.info("Post scheduled: %s on %s", submission_id, platforms)
+                return submission_id
+            logger.error("No submission_id in response: %s", data)
+            return None
+
+        except Exception as exc:
+            logger.error("Post scheduling failed: %s", exc)
+            return None
+
     # ── Status check ─────────────────────────────────────────────────────
 
     def get_post_status(self, post_submission_id: str) -> dict[str, Any]:
@@ -122,7 +214,7 @@ class BlatoScheduler:
 
         url = f"{self.base_url}/v2/posts/{post_submission_id}"
         try:
-            resp = requests.get(url, headers=self._headers(), timeout=30)
+            resp = self._session.get(url, timeout=30)
             resp.raise_for_status()
             return resp.json()
         except Exception as exc:
@@ -135,57 +227,70 @@ class BlatoScheduler:
         self,
         videos_with_captions: list[dict[str, str]],
         platforms: list[str],
-    ) -> list[str]:
+    ) -> list[str | None]:
         """Upload and schedule a batch of videos spread across the next 7 days.
 
-        Each dict must have keys: video_path, caption.
-        Returns a list of submission IDs for successfully scheduled posts.
+        Each dict must have keys: video_path, caption. Items are processed
+        concurrently, up to Config.UPLOAD_CONCURRENCY at a time.
+        Returns one submission ID per input item (None where it failed).
         """
         if not self.api_key:
             logger.error("Cannot schedule batch: BLOTATO_API_KEY not set")
             return []
 
-        submission_ids: list[str] = []
+        return asyncio.run(self._schedule_batch_async(videos_with_captions, platforms))
+
+    async def _schedule_batch_async(
+        self,
+        videos_with_captions: list[dict[str, str]],
+        platforms: list[str],
+    ) -> list[str | None]:
         total = len(videos_with_captions)
         posts_per_day = Config.POSTS_PER_DAY
-
-        # Spread posts across 7 days
-        total_slots = 7 * posts_per_day
         now = datetime.now(timezone.utc)
-
-        for i, item in enumerate(videos_with_captions):
+        # Space posts at 9am, 1pm, 6pm, posts_per_day per day starting tomorrow
+        hours = [9, 13, 18]
+        schedule_times = [
+            (now + timedelta(days=i // posts_per_day + 1))
+            .replace(hour=hours[(i % posts_per_day) % len(hours)], minute=0, second=0, microsecond=0)
+            .isoformat()
+            for i in range(total)
+        ]
+        semaphore = asyncio.Semaphore(max(1, Config.UPLOAD_CONCURRENCY))
+
+        async def process(
+            session: aiohttp.ClientSession, i: int, item: dict[str, str]
+        ) -> str | None:
             video_path = item.get("video_path", "")
             caption = item.get("caption", "")
 
             if not video_path or not Path(video_path).exists():
                 logger.warning("Skipping missing video: %s", video_path)
-                continue
-
-            # Calculate schedule time
-            day_offset = i // posts_per_day
-            slot_in_day = i % posts_per_day
-            # Space posts at 9am, 1pm, 6pm
-            hours = [9, 13, 18]
-            hour = hours[slot_in_day % len(hours)]
-            schedule_dt = now + timedelta(days=day_offset + 1)
-            schedule_dt = schedule_dt.replace(hour=hour, minute=0, second=0, microsecond=0)
-            schedule_time = schedule_dt.isoformat()
-
-            logger.info(
-                "Scheduling %d/%d for %s", i + 1, total, schedule_time
-            )
+                return None
+
+            schedule_time = schedule_times[i]
 
-            # Upload
-            media_id = self.upload_media(video_path)
-            if not media_id:
-                continue
+            async with semaphore:
+                logger.info("Scheduling %d/%d for %s", i + 1, total, schedule_time)
 
-            # Schedule
-            sub_id = self.schedule_post(media_id, caption, platforms, schedule_time)
-            if sub_id:
-                submission_ids.append(sub_id)
+                # Upload
+                media_id = await self._upload_media_async(session, video_path)
+                if not media_id:
+                    return None
+
+                # Schedule
+                return await self._schedule_post_async(
+                    session, media_id, caption, platforms, schedule_time
+                )
+
+        async with aiohttp.ClientSession(headers=self._headers()) as session:
+            submission_ids = await asyncio.gather(
+                *(process(session, i, item) for i, item in enumerate(videos_with_captions))
+            )
 
         logger.info(
-            "Batch scheduling complete: %d/%d scheduled", len(submission_ids), total
+            "Batch scheduling complete: %d/%d scheduled",
+            sum(1 for sub_id in submission_ids if sub_id),
+            total,
         )
-        return submission_ids
+        return list(submission_ids)
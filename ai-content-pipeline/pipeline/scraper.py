@@ -2,11 +2,17 @@
 Phase 1a: Apify-based content scraping from TikTok, Instagram, and YouTube.
 """
 
+import atexit
+import hashlib
+import heapq
 import json
 import logging
+import os
 import random
 import time
-from typing import Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
 
 from apify_client import ApifyClient
 
@@ -15,6 +21,22 @@ from utils.file_manager import FileManager
 
 logger = logging.getLogger("pipeline.scraper")
 
+# Scrape logs are written off the request path by a single background writer;
+# pending writes are flushed at interpreter exit.
+_LOG_EXEC = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scraper-log")
+atexit.register(_LOG_EXEC.shutdown, wait=True)
+
+
+def _save_log(data: Any, prefix: str) -> None:
+    """Queue a scrape log write; failures are logged, not raised."""
+    def _report(future: Future) -> None:
+        exc = future.exception()
+        if exc is not None:
+            logger.warning("Could not write %s log: %s", prefix, exc)
+
+    _LOG_EXEC.submit(FileManager.save_json, data, Config.LOGS_DIR, prefix).add_done_callback(_report)
+
+
 TIKTOK_SEARCH_TERMS = [
     "make money online",
     "sales tips",
@@ -32,6 +54,45 @@ INSTAGRAM_HASHTAGS = [
 ]
 
 
+def _normalize_tiktok(item: dict[str, Any]) -> dict[str, Any]:
+    """Map a raw TikTok scraper item onto the common content shape."""
+    return {
+        "url": item.get("webVideoUrl", item.get("url", "")),
+        "description": item.get("text", item.get("desc", "")),
+        "likes": item.get("diggCount", item.get("likes", 0)),
+        "shares": item.get("shareCount", item.get("shares", 0)),
+        "views": item.get("playCount", item.get("views", 0)),
+        "author": item.get("authorMeta", {}).get("name", item.get("author", "")),
+        "platform": "tiktok",
+    }
+
+
+def _normalize_instagram(item: dict[str, Any]) -> dict[str, Any]:
+    """Map a raw Instagram hashtag scraper item onto the common content shape."""
+    return {
+        "url": item.get("url", ""),
+        "description": item.get("caption", item.get("text", "")),
+        "likes": item.get("likesCount", item.get("likes", 0)),
+        "shares": item.get("sharesCount", item.get("shares", 0)),
+        "views": item.get("videoViewCount", item.get("views", 0)),
+        "author": item.get("ownerUsername", item.get("author", "")),
+        "platform": "instagram",
+    }
+
+
+def _normalize_youtube(item: dict[str, Any]) -> dict[str, Any]:
+    """Map a raw YouTube scraper item onto the common content shape."""
+    return {
+        "url": item.get("url", ""),
+        "description": item.get("title", item.get("description", "")),
+        "likes": item.get("likes", 0),
+        "shares": item.get("shares", 0),
+        "views": item.get("viewCount", item.get("views", 0)),
+        "author": item.get("channelName", item.get("author", "")),
+        "platform": "youtube",
+    }
+
+
 class ApifyScraper:
     """Scrapes viral content from TikTok, Instagram, and YouTube via Apify."""
 
@@ -42,20 +103,59 @@ class ApifyScraper:
 
     # ── Private helpers ──────────────────────────────────────────────────
 
+    @staticmethod
+    def _cache_path(actor_id: str, run_input: dict[str, Any]) -> Path:
+        """Cache file for an actor run, keyed by actor and exact input."""
+        key = hashlib.sha1(
+            f"{actor_id}|{json.dumps(run_input, sort_keys=True)}".encode()
+        ).hexdigest()
+        return Config.CACHE_DIR / "apify" / f"{key}.json"
+
     def _run_actor(
         self, actor_id: str, run_input: dict[str, Any], timeout: int = 60
-    ) -> list[dict[str, Any]]:
-        """Start an Apify actor run, poll until complete, and return items."""
+    ) -> Iterator[dict[str, Any]]:
+        """Yield items for an actor run, reusing a cached result within the TTL.
+
+        Fresh items are yielded as dataset pages arrive and cached once the
+        run has been read to the end.
+        """
+        cache_path = self._cache_path(actor_id, run_input)
+        if Config.APIFY_CACHE_TTL > 0:
+            try:
+                if time.time() - cache_path.stat().st_mtime < Config.APIFY_CACHE_TTL:
+                    items = json.loads(cache_path.read_text())
+                    logger.info("Actor %s served %d cached items", actor_id, len(items))
+                    yield from items
+                    return
+            except (OSError, ValueError):
+                pass  # missing or unreadable cache entry — run the actor
+
+        items: list[dict[str, Any]] = []
+        for item in self._run_actor_uncached(actor_id, run_input, timeout):
+            items.append(item)
+            yield item
+        logger.info("Actor %s returned %d items", actor_id, len(items))
+
+        if items and Config.APIFY_CACHE_TTL > 0:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                # Write then rename so readers never see a partial file
+                tmp_path = cache_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(items, default=str))
+                os.replace(tmp_path, cache_path)
+            except OSError as exc:
+                logger.warning("Could not cache actor %s results: %s", actor_id, exc)
+
+    def _run_actor_uncached(
+        self, actor_id: str, run_input: dict[str, Any], timeout: int = 60
+    ) -> Iterator[dict[str, Any]]:
+        """Start an Apify actor run, wait until complete, and stream its items."""
         logger.info("Starting Apify actor %s", actor_id)
         run = self.client.actor(actor_id).call(run_input=run_input, timeout_secs=timeout)
         if not run:
             logger.error("Actor %s returned no run object", actor_id)
-            return []
-        items: list[dict[str, Any]] = []
-        for item in self.client.dataset(run["defaultDatasetId"]).iterate_items():
-            items.append(item)
-        logger.info("Actor %s returned %d items", actor_id, len(items))
-        return items
+            return
+        yield from self.client.dataset(run["defaultDatasetId"]).iterate_items()
 
     @staticmethod
     def _engagement_score(item: dict[str, Any]) -> float:
@@ -76,25 +176,15 @@ class ApifyScraper:
             "searchQueries": [search_term],
         }
         try:
-            raw = self._run_actor("clockworks/free-tiktok-scraper", run_input)
+            results = [
+                _normalize_tiktok(item)
+                for item in self._run_actor("clockworks/free-tiktok-scraper", run_input)
+            ]
         except Exception as exc:
             logger.error("TikTok scrape failed: %s", exc)
             return []
 
-        results = []
-        for item in raw:
-            results.append(
-                {
-                    "url": item.get("webVideoUrl", item.get("url", "")),
-                    "description": item.get("text", item.get("desc", "")),
-                    "likes": item.get("diggCount", item.get("likes", 0)),
-                    "shares": item.get("shareCount", item.get("shares", 0)),
-                    "views": item.get("playCount", item.get("views", 0)),
-                    "author": item.get("authorMeta", {}).get("name", item.get("author", "")),
-                    "platform": "tiktok",
-                }
-            )
-        FileManager.save_json(results, Config.LOGS_DIR, "scrape_tiktok")
+        _save_log(results, "scrape_tiktok")
         return results
 
     def scrape_viral_instagram(self, count: int = 10) -> list[dict[str, Any]]:
@@ -105,25 +195,15 @@ class ApifyScraper:
             "resultsLimit": count,
         }
         try:
-            raw = self._run_actor("apify/instagram-hashtag-scraper", run_input)
+            results = [
+                _normalize_instagram(item)
+                for item in self._run_actor("apify/instagram-hashtag-scraper", run_input)
+            ]
         except Exception as exc:
             logger.error("Instagram scrape failed: %s", exc)
             return []
 
-        results = []
-        for item in raw:
-            results.append(
-                {
-                    "url": item.get("url", ""),
-                    "description": item.get("caption", item.get("text", "")),
-                    "likes": item.get("likesCount", item.get("likes", 0)),
-                    "shares": item.get("sharesCount", item.get("shares", 0)),
-                    "views": item.get("videoViewCount", item.get("views", 0)),
-                    "author": item.get("ownerUsername", item.get("author", "")),
-                    "platform": "instagram",
-                }
-            )
-        FileManager.save_json(results, Config.LOGS_DIR, "scrape_instagram")
+        _save_log(results, "scrape_instagram")
         return results
 
     def scrape_viral_youtube(self, count: int = 5) -> list[dict[str, Any]]:
@@ -134,43 +214,40 @@ class ApifyScraper:
             "maxResults": count,
         }
         try:
-            raw = self._run_actor("streamers/youtube-scraper", run_input)
+            results = [
+                _normalize_youtube(item)
+                for item in self._run_actor("streamers/youtube-scraper", run_input)
+            ]
         except Exception as exc:
             logger.error("YouTube scrape failed: %s", exc)
             return []
 
-        results = []
-        for item in raw:
-            results.append(
-                {
-                    "url": item.get("url", ""),
-                    "description": item.get("title", item.get("description", "")),
-                    "likes": item.get("likes", 0),
-                    "shares": item.get("shares", 0),
-                    "views": item.get("viewCount", item.get("views", 0)),
-                    "author": item.get("channelName", item.get("author", "")),
-                    "platform": "youtube",
-                }
-            )
-        FileManager.save_json(results, Config.LOGS_DIR, "scrape_youtube")
+        _save_log(results, "scrape_youtube")
         return results
 
     def get_top_content(self, count: int = 20) -> list[dict[str, Any]]:
         """Combine results from all platforms and return the top items by engagement."""
         logger.info("Starting content discovery across all platforms")
 
+        # The three actor runs are independent and I/O-bound — run them together
+        scrapers = (
+            self.scrape_viral_tiktok,
+            self.scrape_viral_instagram,
+            self.scrape_viral_youtube,
+        )
         all_content: list[dict[str, Any]] = []
-        all_content.extend(self.scrape_viral_tiktok())
-        all_content.extend(self.scrape_viral_instagram())
-        all_content.extend(self.scrape_viral_youtube())
+        with ThreadPoolExecutor(max_workers=len(scrapers)) as pool:
+            futures = [pool.submit(scrape) for scrape in scrapers]
+            for future in futures:
+                all_content.extend(future.result())
 
         if not all_content:
             logger.warning("No content scraped from any platform")
             return []
 
-        all_content.sort(key=self._engagement_score, reverse=True)
-        top = all_content[:count]
+        # Partial selection: O(n log count) and same order as a full sort
+        top = heapq.nlargest(count, all_content, key=self._engagement_score)
 
-        FileManager.save_json(top, Config.LOGS_DIR, "scrape_top")
+        _save_log(top, "scrape_top")
         logger.info("Returning top %d items from %d total", len(top), len(all_content))
         return top
@@ -2,21 +2,43 @@
 Phase 4: FFmpeg-based video composition — audio overlay, captions, intros.
 """
 
+import functools
 import logging
+import os
 import shutil
 import subprocess
+import tempfile
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 from config import Config
 from utils.file_manager import FileManager
 
+try:
+    import av  # Optional: reads durations from container headers in-process
+except ImportError:
+    av = None
+
 logger = logging.getLogger("pipeline.video_editor")
 
+# Fit any input into a 1080x1920 (9:16) frame, letterboxing as needed
+_SCALE_PAD = (
+    "scale=1080:1920:force_original_aspect_ratio=decrease,"
+    "pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
+)
+_INTRO_SECONDS = 2
+
+# Absolute tool paths plus close_fds=False let subprocess use posix_spawn
+# instead of fork+exec; Python's own fds are non-inheritable by default.
+_FFMPEG = shutil.which("ffmpeg") or "ffmpeg"
+_FFPROBE = shutil.which("ffprobe") or "ffprobe"
+
 
 def _check_ffmpeg() -> bool:
     """Verify that ffmpeg is available on the system."""
-    if shutil.which("ffmpeg") is None:
+    if shutil.which(_FFMPEG) is None:
         logger.error(
             "ffmpeg not found. Install it:\n"
             "  macOS:  brew install ffmpeg\n"
@@ -27,11 +49,143 @@ def _check_ffmpeg() -> bool:
     return True
 
 
+# Encoder flags, in order of preference; libx264 is the software fallback
+_ENCODER_ARGS: dict[str, list[str]] = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-tune", "hq", "-cq", "23"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "55"],
+    "libx264": ["-c:v", "libx264", "-preset", "fast", "-crf", "23"],
+}
+
+
+def _encoder_works(encoder: str) -> bool:
+    """Encode a single tiny frame to confirm the encoder is actually usable.
+
+    Uses the same flags as real encodes, so an encoder that exists but rejects
+    them (e.g. -q:v on Intel VideoToolbox, p4 presets on older NVENC) fails here.
+    """
+    try:
+        result = subprocess.run(
+            [
+                _FFMPEG, "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=c=black:s=256x256:d=0.1",
+                "-frames:v", "1", *_ENCODER_ARGS[encoder], "-f", "null", "-",
+            ],
+            capture_output=True,
+            close_fds=False,
+            timeout=30,
+        )
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_encoder() -> str:
+    """Pick the fastest working H.264 encoder (probed once per process).
+
+    ``ffmpeg -encoders`` only lists what was compiled in, so each hardware
+    candidate is confirmed with a test encode before it is trusted.
+    """
+    preferred = Config.VIDEO_ENCODER
+    if preferred != "auto":
+        return preferred
+
+    try:
+        listing = subprocess.run(
+            [_FFMPEG, "-hide_banner", "-encoders"],
+            capture_output=True,
+            close_fds=False,
+            text=True,
+            timeout=30,
+        ).stdout
+    except Exception:
+        listing = ""
+
+    for encoder in ("h264_nvenc", "h264_videotoolbox"):
+        if encoder in listing and _encoder_works(encoder):
+            logger.info("Using hardware encoder: %s", encoder)
+            return encoder
+    return "libx264"
+
+
+# drawtext values sit inside '...' in the filter graph; ':' and '\\' must be
+# escaped for the option parser, and '%' and '\\' once more for drawtext's
+# own text expansion. Straight quotes can't be escaped inside '...' at all.
+_DRAWTEXT_ESCAPES = str.maketrans({
+    "'": "\u2019",
+    ":": "\\:",
+    "%": "\\\\\\%",
+    "\\": "\\\\\\\\",
+})
+
+
+def _escape_drawtext(text: str) -> str:
+    """Escape text for use as a quoted drawtext ``text=`` value."""
+    return text.translate(_DRAWTEXT_ESCAPES)
+
+
+@functools.lru_cache(maxsize=128)
+def _wrap_caption(caption_text: str, width: int = 40) -> str:
+    """Wrap caption text at word boundaries into newline-separated lines."""
+    lines = textwrap.wrap(
+        caption_text, width=width, break_long_words=False, break_on_hyphens=False
+    )
+    return "\n".join(lines)
+
+
+def _render_workdir() -> tempfile.TemporaryDirectory:
+    """Private scratch directory for one ffmpeg run, removed when it exits."""
+    Config.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return tempfile.TemporaryDirectory(prefix="render_", dir=Config.CACHE_DIR)
+
+
+def _caption_textfile(caption_text: str, workdir: str) -> Path:
+    """Write the wrapped caption into ``workdir`` for drawtext to read."""
+    path = Path(workdir) / "caption.txt"
+    path.write_text(_wrap_caption(caption_text), encoding="utf-8")
+    return path
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_duration(file_path: str, mtime_ns: int) -> float:
+    """Read media duration with PyAV if installed, else ffprobe.
+
+    ``mtime_ns`` is only part of the cache key, so a rewritten file is re-probed.
+    Failures raise rather than return, so lru_cache only memoises successes.
+    """
+    if av is not None:
+        try:
+            with av.open(file_path) as container:
+                if container.duration is not None:
+                    return float(container.duration) / av.time_base
+        except Exception as exc:
+            logger.debug("PyAV could not read %s, falling back to ffprobe: %s", file_path, exc)
+
+    result = subprocess.run(
+        [
+            _FFPROBE, "-v", "error",
+            "-show_entries", "format=duration",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            file_path,
+        ],
+        capture_output=True,
+        close_fds=False,
+        text=True,
+        timeout=30,
+    )
+    return float(result.stdout.strip())
+
+
 class VideoEditor:
     """Composes final videos using ffmpeg-python (and raw ffmpeg fallback)."""
 
     def __init__(self) -> None:
         self.ffmpeg_ok = _check_ffmpeg()
+        self.vcodec = _detect_encoder() if self.ffmpeg_ok else "libx264"
+
+    def _vcodec_args(self) -> list[str]:
+        """Video encoder flags for the detected (or configured) encoder."""
+        return _ENCODER_ARGS.get(self.vcodec, ["-c:v", self.vcodec])
 
     def _run_ffmpeg(self, args: list[str]) -> bool:
         """Execute an ffmpeg command. Returns True on success."""
@@ -39,12 +193,13 @@ class VideoEditor:
             logger.error("ffmpeg is not installed — cannot process video")
             return False
 
-        cmd = ["ffmpeg", "-y"] + args  # -y to overwrite
+        cmd = [_FFMPEG, "-y"] + args  # -y to overwrite
         logger.debug("Running: %s", " ".join(cmd))
         try:
             result = subprocess.run(
                 cmd,
                 capture_output=True,
+                close_fds=False,
                 text=True,
                 timeout=300,
             )
@@ -86,8 +241,8 @@ class VideoEditor:
                 "-stream_loop", "-1", "-i", video_path,
                 "-i", audio_path,
                 "-t", str(a_dur),
-                "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+                "-vf", _SCALE_PAD,
+                *self._vcodec_args(),
                 "-c:a", "aac", "-b:a", "192k",
                 "-shortest",
                 output_path,
@@ -98,8 +253,8 @@ class VideoEditor:
                 "-i", video_path,
                 "-i", audio_path,
                 "-t", str(a_dur),
-                "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2",
-                "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+                "-vf", _SCALE_PAD,
+                *self._vcodec_args(),
                 "-c:a", "aac", "-b:a", "192k",
                 "-map", "0:v:0", "-map", "1:a:0",
                 output_path,
@@ -119,39 +274,19 @@ class VideoEditor:
 
         White bold text with black outline, positioned at bottom 20%.
         """
-        # Wrap text at 40 chars
-        lines = []
-        words = caption_text.split()
-        current_line = ""
-        for word in words:
-            if len(current_line) + len(word) + 1 > 40:
-                lines.append(current_line)
-                current_line = word
-            else:
-                current_line = f"{current_line} {word}".strip()
-        if current_line:
-            lines.append(current_line)
-        wrapped = "\\n".join(lines)
-
-        # Escape special chars for ffmpeg drawtext
-        safe_text = wrapped.replace("'", "\u2019").replace(":", "\\:")
-
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-        args = [
-            "-i", video_path,
-            "-vf", (
-                f"drawtext=text='{safe_text}'"
-                f":fontsize=36:fontcolor=white"
-                f":borderw=2:bordercolor=black"
-                f":x=(w-text_w)/2:y=h*0.80"
-            ),
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
-            "-c:a", "copy",
-            output_path,
-        ]
+        with _render_workdir() as workdir:
+            args = [
+                "-i", video_path,
+                "-vf", self._caption_filter(caption_text, workdir),
+                *self._vcodec_args(),
+                "-c:a", "copy",
+                output_path,
+            ]
+            ok = self._run_ffmpeg(args)
 
-        if self._run_ffmpeg(args) and FileManager.verify_file(Path(output_path)):
+        if ok and FileManager.verify_file(Path(output_path)):
             logger.info("Captions added: %s", output_path)
             return output_path
         return None
@@ -162,25 +297,12 @@ class VideoEditor:
         self, video_path: str, hook_text: str, output_path: str
     ) -> str | None:
         """Add a 2-second text card at the beginning with a fade transition."""
-        safe_text = hook_text.replace("'", "\u2019").replace(":", "\\:")
-
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
-        # Create a 2s black card with text, then concatenate with main video
-        # Using complex filter: generate black bg + text, fade, concat
+        # Generate the card, scale the main video, then concatenate them
         filter_complex = (
-            # Generate 2-second black background at 1080x1920
-            f"color=c=black:s=1080x1920:d=2:r=24[bg];"
-            # Draw hook text on the black background
-            f"[bg]drawtext=text='{safe_text}'"
-            f":fontsize=48:fontcolor=white"
-            f":x=(w-text_w)/2:y=(h-text_h)/2"
-            f",fade=t=in:st=0:d=0.5"
-            f",fade=t=out:st=1.5:d=0.5[intro];"
-            # Scale the main video
-            f"[0:v]scale=1080:1920:force_original_aspect_ratio=decrease,"
-            f"pad=1080:1920:(ow-iw)/2:(oh-ih)/2[main];"
-            # Concatenate intro + main
+            f"{self._intro_card_filter(hook_text)}[intro];"
+            f"[0:v]{_SCALE_PAD},setsar=1[main];"
             f"[intro][main]concat=n=2:v=1:a=0[outv]"
         )
 
@@ -188,7 +310,7 @@ class VideoEditor:
             "-i", video_path,
             "-filter_complex", filter_complex,
             "-map", "[outv]",
-            "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+            *self._vcodec_args(),
             "-an",  # We'll add audio separately
             output_path,
         ]
@@ -207,55 +329,128 @@ class VideoEditor:
         caption: str,
         hook: str,
         output_path: str | None = None,
+        threads: int | None = None,
     ) -> str | None:
-        """Run the full composition pipeline:
-        1. Add intro card
-        2. Merge with audio
-        3. Burn captions
+        """Compose the final video in a single ffmpeg pass.
+
+        One filter graph builds the intro card, concatenates it with the scaled
+        (and, if the voiceover is longer, looped) main video, burns captions,
+        and muxes the voiceover — one decode and one encode, no intermediate
+        videos.
+        If that pass fails, it is retried once with just scale, loop and audio.
+        ``threads`` caps ffmpeg's own worker threads (used by compose_batch).
         """
         if not output_path:
             filename = FileManager.timestamped_name("final", "mp4")
             output_path = str(Config.FINAL_DIR / filename)
 
-        temp_dir = Config.OUTPUTS_DIR / "temp"
-        temp_dir.mkdir(parents=True, exist_ok=True)
+        v_dur = self._get_duration(video_path)
+        a_dur = self._get_duration(audio_path)
+        if v_dur <= 0 or a_dur <= 0:
+            logger.error("Could not determine media durations (video=%.1f, audio=%.1f)", v_dur, a_dur)
+            return None
+
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
         try:
-            # Step 1: intro card
-            intro_path = str(temp_dir / "step1_intro.mp4")
-            result = self.add_intro_card(video_path, hook, intro_path)
-            if not result:
-                logger.warning("Intro card failed, continuing without it")
-                intro_path = video_path
-
-            # Step 2: merge audio
-            merged_path = str(temp_dir / "step2_merged.mp4")
-            result = self.add_audio_to_video(intro_path, audio_path, merged_path)
-            if not result:
-                logger.warning("Audio merge failed, continuing with video only")
-                merged_path = intro_path
-
-            # Step 3: burn captions
-            result = self.add_captions(merged_path, caption, output_path)
-            if not result:
-                logger.warning("Caption burn failed, using merged video as final")
-                # Copy the best result so far
-                import shutil as _shutil
-                _shutil.copy2(merged_path, output_path)
-
-            if FileManager.verify_file(Path(output_path)):
-                logger.info("Final video composed: %s", output_path)
-                return output_path
-            return None
+            composed = self._compose_pass(
+                video_path, audio_path, v_dur, a_dur, output_path,
+                hook=hook, caption=caption, threads=threads,
+            )
+        except OSError as exc:  # caption workdir/textfile could not be written
+            logger.error("Could not prepare captions for %s: %s", video_path, exc)
+            composed = False
+        if composed:
+            logger.info("Final video composed: %s", output_path)
+            return output_path
 
-        except Exception as exc:
-            logger.error("Video composition failed: %s", exc)
-            return None
-        finally:
-            # Clean temp files
-            for f in temp_dir.iterdir():
-                if f.is_file():
-                    f.unlink()
+        # drawtext can fail (no libfreetype/fontconfig, odd text) — still ship
+        # the video with its voiceover, just without intro card and captions
+        logger.warning("Composition failed for %s — retrying without intro/captions", video_path)
+        if self._compose_pass(video_path, audio_path, v_dur, a_dur, output_path, threads=threads):
+            logger.info("Final video composed without intro/captions: %s", output_path)
+            return output_path
+
+        logger.error("Video composition failed for %s", video_path)
+        return None
+
+    def _compose_pass(
+        self,
+        video_path: str,
+        audio_path: str,
+        v_dur: float,
+        a_dur: float,
+        output_path: str,
+        hook: str | None = None,
+        caption: str = "",
+        threads: int | None = None,
+    ) -> bool:
+        """Run one compose ffmpeg pass; ``hook=None`` leaves out the intro card."""
+        intro_seconds = _INTRO_SECONDS if hook is not None else 0
+
+        video_input = ["-i", video_path]
+        if a_dur > v_dur + intro_seconds:
+            # Loop the main clip so intro + video covers the whole voiceover
+            video_input = ["-stream_loop", "-1", *video_input]
+
+        # The caption file only has to outlive this ffmpeg run
+        with _render_workdir() as workdir:
+            if hook is not None:
+                graph = (
+                    f"{self._intro_card_filter(hook)}[intro];"
+                    f"[0:v]{_SCALE_PAD},setsar=1[main];"
+                    f"[intro][main]concat=n=2:v=1:a=0"
+                )
+            else:
+                graph = f"[0:v]{_SCALE_PAD},setsar=1"
+            if caption:
+                graph += f",{self._caption_filter(caption, workdir)}"
+            graph += "[outv]"
+
+            args = [
+                *video_input,
+                "-i", audio_path,
+                "-filter_complex", graph,
+                "-map", "[outv]", "-map", "1:a:0",
+                "-t", str(a_dur),
+                *self._vcodec_args(),
+                "-c:a", "aac", "-b:a", "192k",
+            ]
+            if threads:
+                args += ["-threads", str(threads)]
+            args.append(output_path)
+            ok = self._run_ffmpeg(args)
+
+        return ok and FileManager.verify_file(Path(output_path))
+
+    def compose_batch(
+        self, items: list[dict[str, Any]], max_workers: int | None = None
+    ) -> list[str | None]:
+        """Compose several final videos concurrently.
+
+        Each item holds compose_final keyword arguments and should carry its
+        own ``output_path`` so parallel renders never collide. The work is in
+        ffmpeg subprocesses, so a thread pool is enough; each ffmpeg gets an
+        equal share of the cores. Returns final paths in input order (None
+        for failures).
+        """
+        if not items:
+            return []
+
+        cpus = os.cpu_count() or 2
+        workers = max(1, min(max_workers or cpus // 2, len(items)))
+        threads = max(2, cpus // workers)
+
+        def compose(item: dict[str, Any]) -> str | None:
+            try:
+                return self.compose_final(**item, threads=threads)
+            except Exception as exc:
+                logger.error("Composition failed for %s: %s", item.get("video_path"), exc)
+                return None
+
+        logger.info("Composing %d videos (%d parallel, %d threads each)", len(items), workers, threads)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(compose, items))
 
     # ── Thumbnail ────────────────────────────────────────────────────────
 
@@ -282,21 +477,44 @@ class VideoEditor:
 
     # ── Helpers ──────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _caption_filter(caption_text: str, workdir: str) -> str:
+        """drawtext filter for captions: white bold text, black outline, bottom 20%.
+
+        The text is read verbatim from a file, so it needs no escaping and long
+        captions don't bloat the filter string.
+        """
+        textfile = _caption_textfile(caption_text, workdir).as_posix().replace(":", "\\:")
+        return (
+            f"drawtext=textfile='{textfile}':expansion=none"
+            f":fontsize=36:fontcolor=white"
+            f":borderw=2:bordercolor=black"
+            f":x=(w-text_w)/2:y=h*0.80"
+        )
+
+    @staticmethod
+    def _intro_card_filter(hook_text: str) -> str:
+        """Source filter chain for the black hook-text card with fade in/out."""
+        safe_text = _escape_drawtext(hook_text)
+        return (
+            f"color=c=black:s=1080x1920:d={_INTRO_SECONDS}:r=24,"
+            f"drawtext=text='{safe_text}'"
+            f":fontsize=48:fontcolor=white"
+            f":x=(w-text_w)/2:y=(h-text_h)/2"
+            f",fade=t=in:st=0:d=0.5"
+            f",fade=t=out:st={_INTRO_SECONDS - 0.5}:d=0.5"
+            f",setsar=1"
+        )
+
     def _get_duration(self, file_path: str) -> float:
-        """Get media duration in seconds using ffprobe."""
+        """Get media duration in seconds (cached per file path + mtime)."""
         try:
-            result = subprocess.run(
-                [
-                    "ffprobe", "-v", "error",
-                    "-show_entries", "format=duration",
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    file_path,
-                ],
-                capture_output=True,
-                text=True,
-                timeout=30,
-            )
-            return float(result.stdout.strip())
+            mtime_ns = os.stat(file_path).st_mtime_ns
+        except OSError as exc:
+            logger.error("Cannot stat %s: %s", file_path, exc)
+            return 0.0
+        try:
+            return _probe_duration(file_path, mtime_ns)
         except Exception as exc:
             logger.error("ffprobe failed for %s: %s", file_path, exc)
             return 0.0
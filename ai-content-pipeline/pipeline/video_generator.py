@@ -2,18 +2,32 @@
 Phase 2: Higgsfield AI video generation with Soul ID support.
 """
 
+import hashlib
 import logging
+import os
+import random
+import shutil
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
 
 from config import Config
 from utils.file_manager import FileManager
 
 logger = logging.getLogger("pipeline.video_generator")
 
+# A submit that dies on the wire is resent with the same Idempotency-Key, so
+# the server dedupes it instead of starting (and billing) a second job
+_SUBMIT_ATTEMPTS = 3
+_SUBMIT_DELAYS = (2.0, 4.0)
+
 
 class HiggsFieldGenerator:
     """Generates AI videos using the Higgsfield API."""
@@ -25,40 +39,83 @@ class HiggsFieldGenerator:
         if not self.api_key:
             logger.warning("HIGGSFIELD_API_KEY is not set — video generation will be skipped")
 
+        # One keep-alive session for polling, downloads and uploads; idempotent
+        # requests (polls, downloads) are retried on transient gateway errors
+        self._session = requests.Session()
+        self._session.headers.update(self._headers())
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]
+            ),
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
     def _headers(self) -> dict[str, str]:
+        # Content-Type is set per request (json= / files=) by requests itself
         return {
             "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
         }
 
+    def close(self) -> None:
+        """Close pooled connections."""
+        self._session.close()
+
+    @staticmethod
+    def _retry_after(resp: requests.Response) -> float:
+        """Seconds the server asked us to wait (Retry-After), or 0."""
+        try:
+            return max(0.0, float(resp.headers.get("Retry-After", 0)))
+        except ValueError:
+            return 0.0  # HTTP-date form — fall back to our own backoff
+
     def _poll_status(
         self,
         url: str,
         status_key: str = "status",
         done_value: str = "completed",
-        interval: int = 10,
-        max_polls: int = 20,
+        initial: float = 2.0,
+        cap: float = 30.0,
+        timeout: float = 200.0,
     ) -> dict[str, Any] | None:
-        """Poll an endpoint until the status reaches done_value or we time out."""
-        for attempt in range(max_polls):
+        """Poll an endpoint until the status reaches done_value or we time out.
+
+        Waits grow exponentially from ``initial`` up to ``cap`` with full
+        jitter, so short jobs are noticed quickly and concurrent pollers don't
+        synchronise. A 429 waits at least as long as its Retry-After header.
+        """
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            min_wait = 0.0
             try:
-                resp = requests.get(url, headers=self._headers(), timeout=30)
-                resp.raise_for_status()
-                data = resp.json()
-                current = data.get(status_key, "unknown")
-                logger.debug("Poll %d/%d — status: %s", attempt + 1, max_polls, current)
-
-                if current == done_value or current == "ready":
-                    return data
-                if current in ("failed", "error"):
-                    logger.error("Polling returned failure status: %s", data)
-                    return None
+                resp = self._session.get(url, timeout=30)
+                if resp.status_code == 429:
+                    min_wait = self._retry_after(resp)
+                    logger.warning("Poll rate-limited, retrying in >= %.0fs", min_wait)
+                else:
+                    resp.raise_for_status()
+                    data = resp.json()
+                    current = data.get(status_key, "unknown")
+                    logger.debug("Poll %d — status: %s", attempt + 1, current)
+
+                    if current == done_value or current == "ready":
+                        return data
+                    if current in ("failed", "error"):
+                        logger.error("Polling returned failure status: %s", data)
+                        return None
             except Exception as exc:
                 logger.warning("Poll request failed: %s", exc)
 
-            time.sleep(interval)
+            delay = max(min_wait, random.uniform(0, min(cap, initial * 2 ** attempt)))
+            if time.monotonic() + delay > deadline:
+                break
+            time.sleep(delay)
+            attempt += 1
 
-        logger.error("Polling timed out after %d attempts", max_polls)
+        logger.error("Polling timed out after %.0fs (%d attempts)", timeout, attempt + 1)
         return None
 
     # ── Soul ID ──────────────────────────────────────────────────────────
@@ -82,8 +139,27 @@ class HiggsFieldGenerator:
             files.append(("photos", (p.name, open(p, "rb"), "image/jpeg")))
 
         try:
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-            resp = requests.post(url, headers=headers, files=files, timeout=60)
+            # Same photo set -> same key, so a retried create can't make a second
+            # Soul ID. Keyed on name/size/mtime rather than content: the header
+            # goes out before the body, so hashing the bytes would read every
+            # photo twice.
+            digest = hashlib.sha256()
+            for _, (name, f, _) in files:
+                st = os.fstat(f.fileno())
+                digest.update(f"{name}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+
+            # Streams the photos from disk instead of building the whole
+            # multipart body in memory
+            encoder = MultipartEncoder(fields=files)
+            resp = self._session.post(
+                url,
+                headers={
+                    "Content-Type": encoder.content_type,
+                    "Idempotency-Key": digest.hexdigest(),
+                },
+                data=encoder,
+                timeout=60,
+            )
             resp.raise_for_status()
             data = resp.json()
             soul_id = data.get("soul_id", data.get("id", ""))
@@ -94,7 +170,7 @@ class HiggsFieldGenerator:
 
             # Poll until ready
             poll_url = f"{self.base_url}/v1/soul-id/{soul_id}/status"
-            result = self._poll_status(poll_url, interval=15, max_polls=20)
+            result = self._poll_status(poll_url, timeout=300)
             if not result:
                 logger.error("Soul ID creation timed out")
                 return None
@@ -119,11 +195,37 @@ class HiggsFieldGenerator:
         soul_id: str,
         duration: int = 15,
         motion_intensity: float = 0.7,
+        idempotency_key: str | None = None,
     ) -> str | None:
         """Generate a single video and download it locally.
 
+        ``idempotency_key`` identifies the logical request (see
+        _submit_generation); by default each call is a new job.
         Returns the local file path or None on failure.
         """
+        generation_id = self._submit_generation(
+            prompt, soul_id, duration, motion_intensity, idempotency_key
+        )
+        if not generation_id:
+            return None
+        return self._await_generation(generation_id)
+
+    def _submit_generation(
+        self,
+        prompt: str,
+        soul_id: str,
+        duration: int = 15,
+        motion_intensity: float = 0.7,
+        idempotency_key: str | None = None,
+    ) -> str | None:
+        """Start a generation job. Returns its generation_id, or None on failure.
+
+        Connection errors and timeouts are retried a few times with the same
+        ``idempotency_key``, so a request that reached the server before the
+        connection dropped isn't started twice. Callers should derive the key
+        from the logical submission; without one, a random key still covers
+        these retries.
+        """
         if not self.api_key:
             logger.error("Cannot generate video: HIGGSFIELD_API_KEY not set")
             return None
@@ -138,8 +240,28 @@ class HiggsFieldGenerator:
             "aspect_ratio": "9:16",
         }
 
+        idempotency_key = idempotency_key or str(uuid.uuid4())
+
         try:
-            resp = requests.post(url, headers=self._headers(), json=payload, timeout=60)
+            for attempt in range(_SUBMIT_ATTEMPTS):
+                try:
+                    resp = self._session.post(
+                        url,
+                        headers={"Idempotency-Key": idempotency_key},
+                        json=payload,
+                        timeout=60,
+                    )
+                    break
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    if attempt == _SUBMIT_ATTEMPTS - 1:
+                        raise
+                    base = _SUBMIT_DELAYS[min(attempt, len(_SUBMIT_DELAYS) - 1)]
+                    delay = base * 0.5 + random.random() * base * 0.5
+                    logger.warning(
+                        "Generation submit attempt %d/%d failed: %s — retrying in %.1fs",
+                        attempt + 1, _SUBMIT_ATTEMPTS, exc, delay,
+                    )
+                    time.sleep(delay)
             resp.raise_for_status()
             data = resp.json()
             generation_id = data.get("generation_id", data.get("id", ""))
@@ -147,10 +269,18 @@ class HiggsFieldGenerator:
             if not generation_id:
                 logger.error("No generation_id in response: %s", data)
                 return None
+            return generation_id
 
+        except Exception as exc:
+            logger.error("Video generation failed: %s", exc)
+            return None
+
+    def _await_generation(self, generation_id: str) -> str | None:
+        """Poll a started job until done and download the video locally."""
+        try:
             # Poll for completion
             poll_url = f"{self.base_url}/v1/generations/{generation_id}"
-            result = self._poll_status(poll_url, interval=10, max_polls=20)
+            result = self._poll_status(poll_url, timeout=200)
             if not result:
                 logger.error("Video generation timed out for id=%s", generation_id)
                 return None
@@ -170,29 +300,70 @@ class HiggsFieldGenerator:
             return None
 
         except Exception as exc:
-            logger.error("Video generation failed: %s", exc)
+            logger.error("Video generation failed for id=%s: %s", generation_id, exc)
             return None
 
     def _download_file(self, url: str, output_path: Path) -> None:
         """Download a file from a URL."""
-        resp = requests.get(url, stream=True, timeout=120)
-        resp.raise_for_status()
-        with open(output_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                f.write(chunk)
+        # Result URLs are pre-signed storage links: don't forward the API key
+        with self._session.get(
+            url, headers={"Authorization": None}, stream=True, timeout=120
+        ) as resp:
+            resp.raise_for_status()
+            resp.raw.decode_content = True  # undo any Content-Encoding
+            with open(output_path, "wb") as f:
+                shutil.copyfileobj(resp.raw, f, length=1 << 16)
+
+    def generate_videos(
+        self,
+        prompts: list[str],
+        soul_id: str,
+        max_workers: int | None = None,
+        idempotency_keys: list[str] | None = None,
+        duration: int = 15,
+        motion_intensity: float = 0.7,
+    ) -> list[str | None]:
+        """Generate one video per prompt with the jobs running concurrently.
+
+        Every job is submitted up front so the server works on all of them
+        from the start; polling and downloads then run on worker threads, so
+        the batch takes about as long as its slowest job instead of the sum.
+        ``idempotency_keys`` (one per prompt) should identify each logical
+        submission; they default to fresh keys, so equal prompts still become
+        separate jobs.
+        Returns local paths in prompt order (None where generation failed).
+        """
+        if not prompts:
+            return []
+
+        keys = idempotency_keys or [str(uuid.uuid4()) for _ in prompts]
+        generation_ids = [
+            self._submit_generation(prompt, soul_id, duration, motion_intensity, key)
+            for prompt, key in zip(prompts, keys)
+        ]
+        logger.info(
+            "Submitted %d/%d generations", sum(1 for g in generation_ids if g), len(prompts)
+        )
+
+        workers = max(1, min(max_workers or Config.HIGGSFIELD_CONCURRENCY, len(prompts)))
+
+        def collect(generation_id: str | None) -> str | None:
+            return self._await_generation(generation_id) if generation_id else None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(collect, generation_ids))
 
     def generate_batch(
         self, scripts: list[dict[str, Any]], soul_id: str
     ) -> list[str]:
-        """Generate one video per script sequentially.
+        """Generate one video per script (concurrently, see generate_videos).
 
         Returns a list of local file paths for successfully generated videos.
         """
+        hooks = [script.get("hook", script.get("topic", "AI video")) for script in scripts]
+        logger.info("Generating %d videos", len(hooks))
         paths: list[str] = []
-        for i, script in enumerate(scripts):
-            hook = script.get("hook", script.get("topic", "AI video"))
-            logger.info("Generating video %d/%d: %s", i + 1, len(scripts), hook[:60])
-            path = self.generate_video(hook, soul_id)
+        for hook, path in zip(hooks, self.generate_videos(hooks, soul_id)):
             if path:
                 paths.append(path)
             else:
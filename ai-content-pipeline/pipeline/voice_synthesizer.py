@@ -24,6 +24,8 @@ class ElevenLabsVoice:
             self.client = None
         else:
             self.client = ElevenLabs(api_key=self.api_key)
+        # First available voice, looked up once when no voice is configured
+        self._cached_fallback: str | None = None
 
     # ── Voice cloning ────────────────────────────────────────────────────
 
@@ -77,6 +79,8 @@ class ElevenLabsVoice:
             return Config.ELEVENLABS_VOICE_ID
 
         # Fall back to first available voice
+        if self._cached_fallback:
+            return self._cached_fallback
         if not self.client:
             return None
         try:
@@ -85,6 +89,7 @@ class ElevenLabsVoice:
             if voice_list:
                 fallback_id = voice_list[0].voice_id
                 logger.info("Using fallback voice: %s", fallback_id)
+                self._cached_fallback = fallback_id
                 return fallback_id
         except Exception as exc:
             logger.error("Failed to list voices: %s", exc)
@@ -127,10 +132,11 @@ class ElevenLabsVoice:
                 },
             )
 
-            # Write audio bytes to file
+            # Write audio bytes to file; the 64 KB buffer coalesces the small
+            # streamed chunks into a few large writes
             out = Path(output_path)
             out.parent.mkdir(parents=True, exist_ok=True)
-            with open(out, "wb") as f:
+            with open(out, "wb", buffering=1 << 16) as f:
                 for chunk in audio_generator:
                     f.write(chunk)
 
@@ -141,12 +147,16 @@ class ElevenLabsVoice:
 
         except Exception as exc:
             logger.error("Speech synthesis failed: %s", exc)
+            if resolved_id == self._cached_fallback and getattr(exc, "status_code", None) == 404:
+                # The fallback voice was deleted — look it up again next time
+                self._cached_fallback = None
             return None
 
     def synthesize_script(
         self,
         script_dict: dict[str, Any],
         voice_id: str | None = None,
+        output_path: str | None = None,
     ) -> str | None:
         """Synthesize the full_script field from a Gemini script dict.
 
@@ -166,4 +176,4 @@ class ElevenLabsVoice:
             logger.error("No script text to synthesize")
             return None
 
-        return self.synthesize(full_script, voice_id)
+        return self.synthesize(full_script, voice_id, output_path)
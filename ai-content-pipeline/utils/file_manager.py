@@ -4,14 +4,22 @@ File management utilities — temp files, downloads, storage paths.
 
 import json
 import logging
+import os
 import shutil
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 
 from config import Config
 
+try:
+    import orjson  # Optional: much faster JSON serialisation
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger("pipeline.files")
 
+_TS_FORMAT = "%Y%m%d_%H%M%S"  # UTC
+
 
 class FileManager:
     """Handles file organisation, temp files, and storage."""
@@ -24,17 +32,24 @@ class FileManager:
     @staticmethod
     def timestamped_name(prefix: str, ext: str) -> str:
         """Generate a timestamped filename."""
-        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        return f"{prefix}_{ts}.{ext}"
+        return f"{prefix}_{time.strftime(_TS_FORMAT, time.gmtime())}.{ext}"
 
     @staticmethod
     def save_json(data: object, directory: Path, prefix: str) -> Path:
         """Save data as a timestamped JSON file. Returns the path."""
         directory.mkdir(parents=True, exist_ok=True)
-        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-        path = directory / f"{prefix}_{ts}.json"
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        path = directory / FileManager.timestamped_name(prefix, "json")
+        if orjson is not None:
+            path.write_bytes(
+                orjson.dumps(
+                    data,
+                    default=str,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                )
+            )
+        else:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2, default=str)
         logger.debug("Saved JSON: %s", path)
         return path
 
@@ -54,16 +69,22 @@ class FileManager:
         """List files in a directory, optionally filtered by extension."""
         if not directory.exists():
             return []
-        files = [f for f in directory.iterdir() if f.is_file()]
-        if extensions:
-            files = [f for f in files if f.suffix.lower() in extensions]
+        # One pass: DirEntry caches its type, so no per-file stat() call
+        with os.scandir(directory) as entries:
+            files = [
+                Path(entry.path)
+                for entry in entries
+                if entry.is_file()
+                and (not extensions or entry.name.lower().endswith(extensions))
+            ]
         return sorted(files)
 
     @staticmethod
     def clean_dir(directory: Path) -> None:
         """Remove all files in a directory (not subdirectories)."""
         if directory.exists():
-            for f in directory.iterdir():
-                if f.is_file():
-                    f.unlink()
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        os.unlink(entry.path)
             logger.info("Cleaned directory: %s", directory)
@@ -2,12 +2,42 @@
 Structured logging — console at INFO, file at DEBUG.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
-from datetime import datetime, timezone
+import time
 from pathlib import Path
 
 
+class _DailyFileHandler(logging.FileHandler):
+    """Append to ``pipeline_<UTC date>.log``, switching files when the date changes.
+
+    Files are never renamed, so several pipeline processes (a --continuous run
+    plus ad-hoc CLI commands) can safely share the logs directory.
+    """
+
+    def __init__(self, logs_dir: Path) -> None:
+        self._logs_dir = logs_dir
+        self._date = time.strftime("%Y-%m-%d", time.gmtime())
+        super().__init__(self._path(), encoding="utf-8", delay=True)
+
+    def _path(self) -> Path:
+        return self._logs_dir / f"pipeline_{self._date}.log"
+
+    def emit(self, record: logging.LogRecord) -> None:
+        date = time.strftime("%Y-%m-%d", time.gmtime(record.created))
+        if date != self._date:
+            # Close the previous day's file; FileHandler reopens on next write
+            self._date = date
+            self.baseFilename = str(self._path().resolve())
+            if self.stream:
+                self.stream.close()
+                self.stream = None  # type: ignore[assignment]
+        super().emit(record)
+
+
 def setup_logger(name: str = "pipeline") -> logging.Logger:
     """Return a configured logger that writes to console and a daily log file."""
     logger = logging.getLogger(name)
@@ -31,10 +61,18 @@ def setup_logger(name: str = "pipeline") -> logging.Logger:
     # File handler — DEBUG
     logs_dir = Path(__file__).resolve().parent.parent / "outputs" / "logs"
     logs_dir.mkdir(parents=True, exist_ok=True)
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    file_handler = logging.FileHandler(logs_dir / f"pipeline_{today}.log")
+    file_handler = _DailyFileHandler(logs_dir)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(fmt)
-    logger.addHandler(file_handler)
+
+    # The file write happens on a listener thread; logging calls only enqueue
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    logger._listener = listener  # type: ignore[attr-defined]  # keep it alive
+    atexit.register(listener.stop)  # drains queued records before exit
 
     return logger
@@ -5,6 +5,8 @@ Retry helper with exponential backoff.
 import asyncio
 import functools
 import logging
+import random
+import time
 from typing import Any, Callable, TypeVar
 
 logger = logging.getLogger("pipeline.retry")
@@ -23,14 +25,15 @@ async def retry_async(
 
     Returns the result on success or None after all attempts are exhausted.
     """
-    last_exc: Exception | None = None
     for attempt in range(max_attempts):
         try:
             return await func(*args, **kwargs)
         except Exception as exc:
-            last_exc = exc
             if attempt < max_attempts - 1:
-                delay = delays[min(attempt, len(delays) - 1)]
+                # Equal jitter: somewhere in [base/2, base] so callers that
+                # failed together don't retry in lock-step
+                base = delays[min(attempt, len(delays) - 1)]
+                delay = base * 0.5 + random.random() * base * 0.5
                 logger.warning(
                     "Attempt %d/%d failed for %s: %s — retrying in %.1fs",
                     attempt + 1,
@@ -57,17 +60,19 @@ def retry_sync(
     delays: tuple[float, ...] = (2.0, 4.0, 8.0),
     **kwargs: Any,
 ) -> Any:
-    """Synchronous retry with exponential backoff."""
-    import time
+    """Synchronous retry with exponential backoff.
 
-    last_exc: Exception | None = None
+    Returns the result on success or None after all attempts are exhausted.
+    """
     for attempt in range(max_attempts):
         try:
             return func(*args, **kwargs)
         except Exception as exc:
-            last_exc = exc
             if attempt < max_attempts - 1:
-                delay = delays[min(attempt, len(delays) - 1)]
+                # Equal jitter: somewhere in [base/2, base] so callers that
+                # failed together don't retry in lock-step
+                base = delays[min(attempt, len(delays) - 1)]
+                delay = base * 0.5 + random.random() * base * 0.5
                 logger.warning(
                     "Attempt %d/%d failed for %s: %s — retrying in %.1fs",
                     attempt + 1,